@@ -1,22 +1,50 @@
 import random
-import tempfile
 import os
+import struct
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
 from io import BytesIO
-from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import letter
 from reportlab.lib import colors
 from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Image, Paragraph
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Image, Paragraph, PageBreak
 from reportlab.lib.styles import getSampleStyleSheet
-from PIL import Image as PILImage
-from PyPDF2 import PdfReader, PdfWriter, PdfMerger
+from reportlab.pdfbase.pdfdoc import PDFArray, PDFDictionary, PDFName, PDFString
+
+# Dedicated generator so the hot paths can bind its methods directly
+rng = random.Random()
+
+ALPHABET = 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789'
+CELL_VALUES = range(101)
+
+# Shared by every element, build them once instead of per paragraph/table
+NORMAL_STYLE = getSampleStyleSheet()['Normal']
+TABLE_STYLE = TableStyle([('BACKGROUND', (0, 0), (-1, -1), colors.white),
+                          ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+                          ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+                          ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+                          ('FONTSIZE', (0, 0), (-1, -1), 8),
+                          ('BOTTOMPADDING', (0, 0), (-1, -1), 0),
+                          ('TOPPADDING', (0, 0), (-1, -1), 0),
+                          ('GRID', (0, 0), (-1, -1), 0.25, colors.black)])
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+def png_chunk(chunk_type, data):
+    return struct.pack('>I', len(data)) + chunk_type + data + struct.pack('>I', zlib.crc32(chunk_type + data))
 
 def generate_random_image():
-    width, height = random.randint(50, 200), random.randint(50, 200)
-    image = PILImage.new('RGB', (width, height), color=(random.randint(0, 255), random.randint(0, 255), random.randint(0, 255)))
-    img_byte_arr = BytesIO()
-    image.save(img_byte_arr, format='PNG')
-    return img_byte_arr.getvalue()
+    # Solid color image, so build the PNG by hand instead of going through PIL's full encoder
+    randint = rng.randint
+    width, height = randint(50, 200), randint(50, 200)
+    color = rng.randbytes(3)
+    ihdr = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)  # 8-bit RGB, no interlace
+    scanline = b'\x00' + color * width  # filter type None
+    return (PNG_SIGNATURE
+            + png_chunk(b'IHDR', ihdr)
+            + png_chunk(b'IDAT', zlib.compress(scanline * height, 1))
+            + png_chunk(b'IEND', b''))
 
 def generate_javascript():
     actions = [
@@ -36,92 +64,69 @@ def generate_javascript():
         "app.launchURL('https://google.com');",
         "this.submitForm('https://example.com/submit');"
     ]
-    return random.choice(actions)
+    return rng.choice(actions)
 
 def generate_random_content():
-    content_type = random.choice(['text', 'table', 'shape', 'image'])
+    choice, choices, randint = rng.choice, rng.choices, rng.randint
+    content_type = choice(['text', 'table', 'shape', 'image'])
     if content_type == 'text':
-        return ''.join(random.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789') for _ in range(random.randint(10, 100)))
+        return ''.join(choices(ALPHABET, k=randint(10, 100)))
     elif content_type == 'table':
-        rows = random.randint(1, 5)
-        cols = random.randint(1, 5)
-        return [[random.randint(0, 100) for _ in range(cols)] for _ in range(rows)]
+        rows = randint(1, 5)
+        cols = randint(1, 5)
+        return [choices(CELL_VALUES, k=cols) for _ in range(rows)]
     elif content_type == 'shape':
-        return random.choice(['circle', 'rectangle', 'line'])
+        return choice(['circle', 'rectangle', 'line'])
     else:  # image
         return generate_random_image()
 
+def javascript_names(js):
+    # Document level script in the catalog's /Names /JavaScript tree, run by the viewer on open
+    action = PDFDictionary({'Type': PDFName('Action'), 'S': PDFName('JavaScript'), 'JS': PDFString(js)})
+    return PDFDictionary({'JavaScript': PDFDictionary({'Names': PDFArray([PDFString('fuzz'), action])})})
+
 def create_pdf(filename):
-    # Create a temporary file for the main PDF
-    with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as main_tmp_file:
-        main_tmp_filename = main_tmp_file.name
-        doc = SimpleDocTemplate(main_tmp_filename, pagesize=letter)
-        elements = []
-        
-        for _ in range(random.randint(3, 30)):  # 3 to 30 elements per PDF
-            content = generate_random_content()
-            if isinstance(content, str):
-                # It's text
-                style = getSampleStyleSheet()['Normal']
-                elements.append(Paragraph(content, style))
-            elif isinstance(content, list):  # Table
-                t = Table(content)
-                t.setStyle(TableStyle([('BACKGROUND', (0, 0), (-1, -1), colors.white),
-                                       ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-                                       ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                                       ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-                                       ('FONTSIZE', (0, 0), (-1, -1), 8),
-                                       ('BOTTOMPADDING', (0, 0), (-1, -1), 0),
-                                       ('TOPPADDING', (0, 0), (-1, -1), 0),
-                                       ('GRID', (0, 0), (-1, -1), 0.25, colors.black)]))
-                elements.append(t)
-            elif isinstance(content, bytes):  # Image
-                img_buffer = BytesIO(content)
-                img = Image(img_buffer, width=2*inch, height=2*inch)
-                elements.append(img)
-        
-        doc.build(elements)
+    doc = SimpleDocTemplate(filename, pagesize=letter)
+    elements = []
+    
+    for _ in range(rng.randint(3, 30)):  # 3 to 30 elements per PDF
+        content = generate_random_content()
+        if isinstance(content, str):
+            # It's text
+            elements.append(Paragraph(content, NORMAL_STYLE))
+        elif isinstance(content, list):  # Table
+            t = Table(content)
+            t.setStyle(TABLE_STYLE)
+            elements.append(t)
+        elif isinstance(content, bytes):  # Image
+            img_buffer = BytesIO(content)
+            img = Image(img_buffer, width=2*inch, height=2*inch)
+            elements.append(img)
+    
+    # JavaScript notice on its own last page
+    elements.append(PageBreak())
+    elements.append(Paragraph("This PDF contains JavaScript", NORMAL_STYLE))
     
-    # Create a temporary file for the JavaScript PDF
-    with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as js_tmp_file:
-        js_tmp_filename = js_tmp_file.name
-        c = canvas.Canvas(js_tmp_filename, pagesize=letter)
-        c.setFont("Helvetica", 10)
-        c.drawString(100, 700, "This PDF contains JavaScript")
-        c.save()
+    names = javascript_names(generate_javascript())
+    
+    def add_javascript(canvas, doc):
+        canvas.setCatalogEntry('Names', names)
     
     try:
-        merger = PdfMerger()
-        merger.append(main_tmp_filename)
-        merger.append(js_tmp_filename)
-        
-        merger.write(filename)
-        merger.close()
-        
-        # Add JavaScript action
-        reader = PdfReader(filename)
-        writer = PdfWriter()
-        
-        for page in reader.pages:
-            writer.add_page(page)
-        
-        writer.add_js(generate_javascript())
-        
-        with open(filename, 'wb') as f:
-            writer.write(f)
-        
+        # Write the JavaScript straight into the catalog, no second pass over the finished PDF
+        doc.build(elements, onFirstPage=add_javascript)
     except Exception as e:
         print(f"An error occurred while creating the PDF: {str(e)}")
-    finally:
-        # Clean up the temporary files
-        os.unlink(main_tmp_filename)
-        os.unlink(js_tmp_filename)
+
+def _seed_worker():
+    # Forked workers inherit the parent's RNG state, reseed so they don't all generate the same testcases
+    rng.seed(os.getpid() ^ time.time_ns())
 
 def generate_pdfs(num_pdfs):
-    for i in range(num_pdfs):
-        filename = f"Testcases\\testcase_{i+1}.pdf"
-        create_pdf(filename)
-        print(f"Generated {filename}")
+    filenames = [f"Testcases\\testcase_{i+1}.pdf" for i in range(num_pdfs)]
+    with ProcessPoolExecutor(initializer=_seed_worker) as executor:
+        for filename, _ in zip(filenames, executor.map(create_pdf, filenames, chunksize=4)):
+            print(f"Generated {filename}")
 
 if __name__ == "__main__":
     num_pdfs = 50  # Change this to generate more or fewer PDFs
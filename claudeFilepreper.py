@@ -1,26 +1,53 @@
 import os
 import shutil
-from pathlib import Path
-from typing import List, Set, Tuple
+from typing import Iterator, List, Set, Tuple
 
 
 def draw_folder_structure(directory: str) -> str:
     folder_tree = []
 
     def traverse(current_dir, prefix=""):
-        items = sorted(os.listdir(current_dir))
-        for index, item in enumerate(items):
-            path = Path(current_dir) / item
-            connector = "└── " if index == len(items) - 1 else "├── "
-            folder_tree.append(f"{prefix}{connector}{item}")
-            if path.is_dir():
-                extension = "    " if index == len(items) - 1 else "│   "
-                traverse(path, prefix + extension)
+        with os.scandir(current_dir) as it:
+            items = sorted(it, key=lambda entry: entry.name)
+        for index, entry in enumerate(items):
+            last = index == len(items) - 1
+            connector = "└── " if last else "├── "
+            folder_tree.append(f"{prefix}{connector}{entry.name}")
+            if entry.is_dir():
+                extension = "    " if last else "│   "
+                traverse(entry.path, prefix + extension)
 
     traverse(directory)
     return "\n".join(folder_tree)
 
 
+def walk_files(directory: str, ignore_folders: Set[str]) -> Iterator[os.DirEntry]:
+    try:
+        it = os.scandir(directory)
+    except OSError:
+        # Match os.walk, which skips directories it can't list
+        return
+    with it:
+        for entry in it:
+            # Classify like os.walk: anything that isn't a directory is treated as a file,
+            # including broken symlinks, FIFOs and entries that can't be stat'ed, so the
+            # copy reports them as failures instead of dropping them
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+            if not is_dir:
+                yield entry
+                continue
+            # Symlinked directories are listed but not followed
+            try:
+                is_symlink = entry.is_symlink()
+            except OSError:
+                is_symlink = True
+            if not is_symlink and entry.name not in ignore_folders:
+                yield from walk_files(entry.path, ignore_folders)
+
+
 def copy_files(
     root_dir: str,
     output_dir: str = "result",
@@ -35,51 +62,50 @@ def copy_files(
     if ignore_patterns is None:
         ignore_patterns = set()
 
-    root_path = Path(root_dir)
-    output_path = Path(output_dir)
-
     # Create the output directory if it doesn't exist
-    output_path.mkdir(parents=True, exist_ok=True)
+    os.makedirs(output_dir, exist_ok=True)
+
+    # Every walked path starts with this, slicing it off gives the relative path
+    root_prefix = os.path.join(root_dir, "")
+
+    # str.endswith checks a whole tuple of suffixes in one call
+    ignore_suffixes = tuple(pattern.replace("*", "") for pattern in ignore_patterns)
 
     copied_files = []
     failed_copies = []
+    # Destination directories already created during this copy
+    created_dirs = {output_dir}
 
     try:
-        # Walk through directory
-        for current_path, dirs, files in os.walk(root_dir):
-            # Remove ignored directories
-            dirs[:] = [d for d in dirs if d not in ignore_folders]
-
-            # Process files
-            for file in files:
-                # Skip files matching ignore patterns
-                if any(
-                    file.endswith(pattern.replace("*", ""))
-                    for pattern in ignore_patterns
-                ):
-                    continue
-
-                # Get source path
-                source_path = Path(current_path) / file
-                relative_path = source_path.relative_to(root_path)
-
-                try:
-                    if flatten:
-                        # Create flattened filename by joining path parts
-                        path_parts = list(relative_path.parts)
-                        flattened_name = separator.join(path_parts)
-                        dest_path = output_path / flattened_name
-                    else:
-                        # Preserve directory structure
-                        dest_path = output_path / relative_path
-                        dest_path.parent.mkdir(parents=True, exist_ok=True)
-
-                    # Copy the file, preserving metadata
-                    shutil.copy2(source_path, dest_path)
-                    copied_files.append(str(relative_path))
-
-                except Exception as e:
-                    failed_copies.append(f"{relative_path} (Error: {str(e)})")
+        # Walk through directory, skipping ignored folders
+        for entry in walk_files(root_dir, ignore_folders):
+            # Skip files matching ignore patterns
+            if entry.name.endswith(ignore_suffixes):
+                continue
+
+            # Get source path
+            source_path = entry.path
+            relative_path = source_path[len(root_prefix):]
+
+            try:
+                if flatten:
+                    # Create flattened filename by joining path parts
+                    flattened_name = relative_path.replace(os.sep, separator)
+                    dest_path = os.path.join(output_dir, flattened_name)
+                else:
+                    # Preserve directory structure
+                    dest_path = os.path.join(output_dir, relative_path)
+                    parent_dir = os.path.dirname(dest_path)
+                    if parent_dir not in created_dirs:
+                        os.makedirs(parent_dir, exist_ok=True)
+                        created_dirs.add(parent_dir)
+
+                # Copy the file, preserving metadata
+                shutil.copy2(source_path, dest_path)
+                copied_files.append(relative_path)
+
+            except Exception as e:
+                failed_copies.append(f"{relative_path} (Error: {str(e)})")
 
     except Exception as e:
         print(f"Error accessing directory {root_dir}: {str(e)}")
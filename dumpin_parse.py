@@ -1,16 +1,18 @@
-import re
 import sys
 
-def parse_cfg_function_table(content):
+HEX_DIGITS = b"0123456789ABCDEFabcdef"
+
+def parse_cfg_function_table(lines):
     addresses = []
-    lines = content.split("\n")
     
     for line in lines:
-        # Match lines that may start with 'E' or 'S' followed by spaces, and then a hexadecimal address
-        match = re.match(r"^\s*[ES]?\s*([0-9A-F]{16})\s*$", line.strip(), re.I)
-        if match:
-            address = match.group(1)
-            addresses.append(address)
+        # Lines may start with 'E' or 'S' followed by spaces, and then a 16 digit hexadecimal address
+        line = line.strip()
+        if len(line) != 16 and line[:1] in b"ESes":
+            line = line[1:].lstrip()
+        # Deleting every hex digit leaves nothing behind only for a pure hex address
+        if len(line) == 16 and not line.translate(None, HEX_DIGITS):
+            addresses.append(line.decode("ascii"))
     
     return addresses
 
@@ -22,22 +24,18 @@ def main():
     file_path = sys.argv[1]
     
     try:
-        with open(file_path, "r") as file:
-            content = file.read()
+        # Stream the dump line by line instead of loading it whole
+        with open(file_path, "rb") as file:
+            addresses = parse_cfg_function_table(file)
     except FileNotFoundError:
         print(f"File not found: {file_path}")
         sys.exit(1)
     
-    addresses = parse_cfg_function_table(content)
-    
-    output_content = "addresses = [\n"
-    for address in addresses:
-        output_content += "    0x" + address + ",\n"
-    output_content += "]"
-    
-    # Save the modified content to a file
-    with open("addresses_array.txt", "w") as file:
-        file.write(output_content)
+    # Stream the array straight into a large write buffer instead of building it in memory
+    with open("addresses_array.txt", "w", buffering=1 << 20) as file:
+        file.write("addresses = [\n")
+        file.writelines(f"    0x{address},\n" for address in addresses)
+        file.write("]")
     
     print("Addresses saved to addresses_array.txt")
 
@@ -1,9 +1,25 @@
 import os
+import sys
 import shutil
 import argparse
 from datetime import datetime
 import stat
 
+if sys.platform == 'win32':
+    import ctypes
+    from ctypes import wintypes
+
+    _kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+    _kernel32.CopyFileW.argtypes = [wintypes.LPCWSTR, wintypes.LPCWSTR, wintypes.BOOL]
+    _kernel32.CopyFileW.restype = wintypes.BOOL
+
+    def copy_file(src, dest):
+        # CopyFileW copies data, attributes and timestamps in a single kernel call
+        if not _kernel32.CopyFileW(src, dest, False):
+            raise ctypes.WinError(ctypes.get_last_error())
+else:
+    copy_file = shutil.copy2
+
 def create_directories(base_dir):
     folders = ['Drivers-Pre', 'Drivers-Post', 'System32-Pre', 'System32-Post']
     for folder in folders:
@@ -12,6 +28,26 @@ def create_directories(base_dir):
             os.makedirs(dir_path)
             print(f"Created directory: {dir_path}")
 
+def walk_files(path):
+    # Like os.walk but yields DirEntry objects, which carry the file type (and on Windows the stat) for free
+    try:
+        it = os.scandir(path)
+    except OSError:
+        # os.walk silently skips directories it can't list, do the same
+        return
+    with it:
+        for entry in it:
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+                is_file = not is_dir and entry.is_file()
+            except OSError:
+                # Skip entries that can't be stat'ed, but keep going with their siblings
+                continue
+            if is_dir:
+                yield from walk_files(entry.path)
+            elif is_file:
+                yield entry
+
 def copy_files(src, dest, extension, only_recent=False):
     if not os.path.exists(src):
         print(f"Source directory {src} does not exist.")
@@ -20,21 +56,22 @@ def copy_files(src, dest, extension, only_recent=False):
     # Set the time threshold to the first day of the current month
     current_time = datetime.now()
     time_threshold = current_time.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    threshold_ts = time_threshold.timestamp()
+    extension = extension.lower()
 
-    for root, dirs, files in os.walk(src):
-        for file in files:
-            if file.endswith(extension):
-                src_file = os.path.join(root, file)
-                dest_file = os.path.join(dest, file)
-                
-                if only_recent:
-                    # Check if the file has been modified within the current month
-                    src_mtime = datetime.fromtimestamp(os.path.getmtime(src_file))
-                    if src_mtime < time_threshold:
-                        continue
+    for entry in walk_files(src):
+        # Windows file names are case-insensitive, e.g. some drivers ship as .SYS
+        if entry.name.lower().endswith(extension):
+            src_file = entry.path
+            dest_file = os.path.join(dest, entry.name)
+            
+            if only_recent:
+                # Check if the file has been modified within the current month
+                if entry.stat().st_mtime < threshold_ts:
+                    continue
 
-                shutil.copy2(src_file, dest_file)
-                print(f"Copied {src_file} to {dest_file}")
+            copy_file(src_file, dest_file)
+            print(f"Copied {src_file} to {dest_file}")
 
 def remove_readonly(func, path, _):
     os.chmod(path, stat.S_IWRITE)
@@ -4,11 +4,35 @@ import os
 import sys
 import subprocess
 import json
+import mmap
 import concurrent.futures
 from datetime import datetime
 from pathlib import Path
 from typing import List, Dict, Any, Optional, Union
 
+try:
+    import yara
+except ImportError:
+    # Fall back to running the YARA executable in batches of rule files
+    yara = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Keep batched command lines well below the 32767 character limit on Windows
+MAX_COMMAND_LENGTH = 30000
+
+# Extra seconds a batched YARA process gets on top of --timeout for compiling its rules
+BATCH_COMPILE_TIMEOUT = 60
+
+def dump_json(data: Any) -> bytes:
+    """Serialize data as indented JSON, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    return json.dumps(data, indent=2).encode("utf-8")
+
 class YaraScanner:
     def __init__(self, 
                  yara_path: str = "yara64.exe", 
@@ -24,6 +48,20 @@ class YaraScanner:
         self.max_workers = max_workers
         self.timeout = timeout
         self.results = []
+        # Results partitioned as they come in, so output needs no extra passes
+        self.match_count = 0
+        self.matches = []
+        self.nonmatches = []
+        self.rules = None
+
+    def add_result(self, result: Dict[str, Any]) -> None:
+        """Record a scan result and file it under matches or non-matches."""
+        self.results.append(result)
+        if result["matches"]:
+            self.match_count += 1
+            self.matches.append(result)
+        else:
+            self.nonmatches.append(result)
 
     def find_rule_files(self) -> List[str]:
         """Find all YARA rule files in the specified directory."""
@@ -102,6 +140,239 @@ class YaraScanner:
                 "error": str(e)
             }
 
+    def split_rule_files(self, rule_files: List[str]) -> List[List[str]]:
+        """Split the rule files into one batch per worker, keeping each command line short enough to launch."""
+        batch_size = -(-len(rule_files) // self.max_workers)
+        batches = []
+        batch = []
+        length = len(self.yara_path) + len(self.target_file) + 32
+        for rule_file in rule_files:
+            arg_length = len(rule_file) + 16
+            if batch and (len(batch) >= batch_size or length + arg_length > MAX_COMMAND_LENGTH):
+                batches.append(batch)
+                batch = []
+                length = len(self.yara_path) + len(self.target_file) + 32
+            batch.append(rule_file)
+            length += arg_length
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def rule_file_messages(self, rule_file: str, stderr_lines: List[str]) -> List[str]:
+        """Pick out the compiler messages YARA printed for one rule file."""
+        # YARA 4 prints "error: path(line): message", older releases "path(line): error: message"
+        prefix = f"{rule_file}("
+        return [line for line in stderr_lines
+                if line.startswith(prefix) or line.partition(": ")[2].startswith(prefix)]
+
+    def scan_with_rule_batch(self, rule_files: List[str]) -> List[Dict[str, Any]]:
+        """
+        Scan the target file with several YARA rule files in one invocation.
+        
+        Every rule file is compiled into its own namespace and -e makes YARA
+        prefix each match with it, so the output can be split per rule file.
+        Rule files YARA reports compile errors for are recorded as errors and
+        the rest of the batch is scanned again in one go. Failures YARA doesn't
+        tie to a rule file (timeouts) are narrowed down by splitting the batch.
+        
+        Args:
+            rule_files: Paths to the YARA rule files
+            
+        Returns:
+            List of scan result dictionaries, one per rule file
+        """
+        if len(rule_files) == 1:
+            return [self.scan_with_rule(rule_files[0])]
+        
+        print(f"Scanning with {len(rule_files)} rules...")
+        
+        namespaces = {f"r{index}": rule_file for index, rule_file in enumerate(rule_files)}
+        cmd = [
+            self.yara_path,
+            "-s",  # Print matching strings
+            "-m",  # Print metadata
+            "-g",  # Print tags
+            "-e",  # Print rule namespace
+            "-a", str(self.timeout),  # Scan timeout
+            *[f"{namespace}:{rule_file}" for namespace, rule_file in namespaces.items()],
+            self.target_file
+        ]
+        
+        try:
+            result = subprocess.run(
+                cmd, 
+                capture_output=True, 
+                text=True, 
+                timeout=self.timeout + BATCH_COMPILE_TIMEOUT
+            )
+        except subprocess.TimeoutExpired:
+            result = None
+        except Exception:
+            # YARA couldn't be launched at all, report it against every rule file
+            return [self.scan_with_rule(rule_file) for rule_file in rule_files]
+        
+        stderr_lines = result.stderr.strip().splitlines() if result is not None else []
+        messages = {rule_file: self.rule_file_messages(rule_file, stderr_lines) for rule_file in rule_files}
+        
+        if result is None or result.returncode != 0:
+            broken = [rule_file for rule_file, lines in messages.items()
+                      if any(line.startswith("error: ") or "): error: " in line for line in lines)]
+            if broken:
+                results = []
+                for rule_file in broken:
+                    error = "\n".join(messages[rule_file])
+                    results.append({
+                        "rule_file": rule_file,
+                        "rule_name": os.path.basename(rule_file),
+                        "stdout": "",
+                        "stderr": error,
+                        "return_code": result.returncode,
+                        "matches": False,
+                        "error": error
+                    })
+                remaining = [rule_file for rule_file in rule_files if rule_file not in broken]
+                if remaining:
+                    results.extend(self.scan_with_rule_batch(remaining))
+                return results
+            
+            # Timed out or failed without naming a rule file, split the batch to isolate the culprit
+            middle = len(rule_files) // 2
+            return self.scan_with_rule_batch(rule_files[:middle]) + self.scan_with_rule_batch(rule_files[middle:])
+        
+        output = {rule_file: [] for rule_file in rule_files}
+        current = None
+        for line in result.stdout.splitlines():
+            if line.startswith("0x"):
+                # Matching string of the rule printed above it
+                if current is not None:
+                    output[current].append(line)
+            elif line.strip():
+                namespace, _, line = line.partition(":")
+                current = namespaces.get(namespace)
+                if current is not None:
+                    output[current].append(line)
+        
+        results = []
+        for rule_file, lines in output.items():
+            stderr = "\n".join(messages[rule_file])
+            results.append({
+                "rule_file": rule_file,
+                "rule_name": os.path.basename(rule_file),
+                "stdout": "\n".join(lines),
+                "stderr": stderr,
+                "return_code": result.returncode,
+                "matches": bool(lines),
+                "error": stderr if stderr else None
+            })
+        return results
+
+    def compile_rules(self, rule_files: List[str]) -> Dict[str, str]:
+        """
+        Compile all rule files into a single yara-python ruleset.
+        
+        Each rule file gets its own namespace (its path) so matches can be
+        traced back to the file that produced them.
+        
+        Args:
+            rule_files: Paths to the YARA rule files
+            
+        Returns:
+            Dictionary mapping rule files that failed to compile to their error
+        """
+        errors = {}
+        try:
+            self.rules = yara.compile(filepaths={rule_file: rule_file for rule_file in rule_files})
+        except yara.Error:
+            # One broken file fails the whole compile, find it and leave it out
+            for rule_file in rule_files:
+                try:
+                    yara.compile(filepath=rule_file)
+                except yara.Error as e:
+                    errors[rule_file] = str(e)
+            valid_files = [rule_file for rule_file in rule_files if rule_file not in errors]
+            if valid_files:
+                try:
+                    self.rules = yara.compile(filepaths={rule_file: rule_file for rule_file in valid_files})
+                except yara.Error as e:
+                    # Every file compiles on its own but not together
+                    for rule_file in valid_files:
+                        errors[rule_file] = str(e)
+        return errors
+
+    def format_match(self, match: Any) -> str:
+        """Format a yara-python match the way the YARA executable prints it with -s -m -g."""
+        tags = ",".join(match.tags)
+        meta = []
+        for key, value in match.meta.items():
+            if isinstance(value, bool):
+                # The executable prints YARA's lowercase booleans
+                meta.append(f"{key}={'true' if value else 'false'}")
+            elif isinstance(value, str):
+                meta.append(f'{key}="{value}"')
+            else:
+                meta.append(f"{key}={value}")
+        meta = ",".join(meta)
+        lines = [f"{match.rule} [{tags}] [{meta}] {self.target_file}"]
+        for string in match.strings:
+            if isinstance(string, tuple):
+                # yara-python < 4.3 reports (offset, identifier, data) tuples
+                instances = [string]
+            else:
+                instances = [(instance.offset, string.identifier, instance.matched_data)
+                             for instance in string.instances]
+            for offset, identifier, data in instances:
+                if data.isascii() and data.decode("ascii").isprintable():
+                    data = data.decode("ascii")
+                else:
+                    data = " ".join(f"{byte:02X}" for byte in data)
+                lines.append(f"0x{offset:x}:{identifier}: {data}")
+        return "\n".join(lines)
+
+    def match_target(self, timeout: int) -> List[Any]:
+        """Map the target file into memory once and run the compiled ruleset over it."""
+        with open(self.target_file, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                # Empty files can't be mapped
+                return self.rules.match(data=b"", timeout=timeout)
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                return self.rules.match(data=data, timeout=timeout)
+
+    def scan_with_library(self, rule_files: List[str]) -> None:
+        """
+        Scan the target file with all rule files in a single yara-python pass.
+        
+        Args:
+            rule_files: Paths to the YARA rule files
+        """
+        print(f"Compiling {len(rule_files)} rule files...")
+        errors = self.compile_rules(rule_files)
+        
+        # --timeout is a per-rule budget, the combined scan gets one for every rule file
+        timeout = self.timeout * len(rule_files)
+        matches_by_rule = {rule_file: [] for rule_file in rule_files}
+        scan_error = None
+        if self.rules is not None:
+            try:
+                for match in self.match_target(timeout):
+                    matches_by_rule[match.namespace].append(match)
+            except yara.TimeoutError:
+                scan_error = f"Timeout after {timeout} seconds"
+            except (yara.Error, OSError) as e:
+                scan_error = str(e)
+        
+        for rule_file, matches in matches_by_rule.items():
+            error = errors.get(rule_file, scan_error)
+            stdout = "\n".join(self.format_match(match) for match in matches)
+            self.add_result({
+                "rule_file": rule_file,
+                "rule_name": os.path.basename(rule_file),
+                "stdout": stdout,
+                "stderr": error or "",
+                "return_code": -1 if error else 0,
+                "matches": stdout != "",
+                "error": error
+            })
+
     def run_scan(self) -> None:
         """Run the scan with all rule files against the target file."""
         if not self.target_file or not os.path.isfile(self.target_file):
@@ -115,24 +386,28 @@ class YaraScanner:
         
         start_time = datetime.now()
         
-        # Run scans in parallel
-        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            future_to_rule = {executor.submit(self.scan_with_rule, rule): rule for rule in rule_files}
-            for future in concurrent.futures.as_completed(future_to_rule):
-                rule = future_to_rule[future]
-                try:
-                    result = future.result()
-                    self.results.append(result)
-                except Exception as e:
-                    print(f"Error processing rule {rule}: {e}")
+        if yara is not None:
+            # Compile once and scan in-process, no executable launched per rule
+            self.scan_with_library(rule_files)
+        else:
+            # Run batched scans in parallel, one YARA process per batch of rules
+            with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                future_to_batch = {executor.submit(self.scan_with_rule_batch, batch): batch
+                                   for batch in self.split_rule_files(rule_files)}
+                for future in concurrent.futures.as_completed(future_to_batch):
+                    batch = future_to_batch[future]
+                    try:
+                        for result in future.result():
+                            self.add_result(result)
+                    except Exception as e:
+                        print(f"Error processing rules {', '.join(batch)}: {e}")
         
         end_time = datetime.now()
         elapsed = (end_time - start_time).total_seconds()
         
         print(f"\nCompleted scan in {elapsed:.2f} seconds")
         
-        matching_rules = [r for r in self.results if r["matches"]]
-        print(f"Found {len(matching_rules)} matching rules out of {len(rule_files)} total rules")
+        print(f"Found {self.match_count} matching rules out of {len(rule_files)} total rules")
 
     def output_results(self, output_file: Optional[str] = None) -> None:
         """
@@ -147,16 +422,16 @@ class YaraScanner:
                 "target_file": self.target_file,
                 "rules_dir": self.rules_dir,
                 "total_rules": len(self.results),
-                "matching_rules": len([r for r in self.results if r["matches"]]),
+                "matching_rules": self.match_count,
                 "results": self.results
             }
             
             if output_file:
-                with open(output_file, 'w') as f:
-                    json.dump(output_data, f, indent=2)
+                with open(output_file, 'wb') as f:
+                    f.write(dump_json(output_data))
                 print(f"Results saved to {output_file}")
             else:
-                print(json.dumps(output_data, indent=2))
+                print(dump_json(output_data).decode("utf-8"))
         else:
             # Text output
             output_lines = [
@@ -166,14 +441,12 @@ class YaraScanner:
                 f"Rules Directory: {self.rules_dir}",
                 f"Scan Time: {datetime.now().isoformat()}",
                 f"Total Rules: {len(self.results)}",
-                f"Matching Rules: {len([r for r in self.results if r['matches']])}",
+                f"Matching Rules: {self.match_count}",
                 f"=====================================\n"
             ]
             
-            # Sort results - matches first
-            sorted_results = sorted(self.results, key=lambda x: not x["matches"])
-            
-            for result in sorted_results:
+            # Matches first
+            for result in self.matches + self.nonmatches:
                 if result["matches"]:
                     output_lines.append(f"[+] MATCH: {result['rule_name']}")
                     output_lines.append(f"{result['stdout']}")
@@ -196,7 +469,7 @@ def main():
     parser = argparse.ArgumentParser(description="Run multiple YARA rules against a single payload")
     parser.add_argument("-r", "--rules-dir", required=True, help="Directory containing YARA rule files")
     parser.add_argument("-t", "--target", required=True, help="File to scan")
-    parser.add_argument("-y", "--yara-path", default="yara64.exe", help="Path to YARA executable")
+    parser.add_argument("-y", "--yara-path", default="yara64.exe", help="Path to YARA executable (only used when yara-python is not installed)")
     parser.add_argument("-o", "--output", help="Output file path")
     parser.add_argument("-f", "--format", choices=["text", "json"], default="text", help="Output format")
     parser.add_argument("-w", "--workers", type=int, default=4, help="Maximum number of concurrent workers")